@@ -12,19 +12,87 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from setuptools import setup, find_packages
+import os
+import shutil
+import sysconfig
+from setuptools import Extension, setup, find_packages
+
+
+# Pure-python modules that are also compiled with Cython when it's available;
+# the .py sources remain the reference implementation and are always shipped.
+_CYTHON_MODULES = (
+    "picosvgx.arc_to_cubic",
+    "picosvgx.geometric_types",
+    # the per-element tree walks (traversal, cleanup, checkpicosvg)
+    "picosvgx.svg",
+    "picosvgx.svg_path_iter",
+    "picosvgx.svg_transform",
+)
+
+
+def _use_ccache():
+    # Route extension builds through ccache when it's installed, so rebuilding
+    # unchanged C sources during development is a cache hit.
+    if not shutil.which("ccache"):
+        return
+    for var in ("CC", "CXX"):
+        compiler = os.environ.get(var) or sysconfig.get_config_var(var)
+        if not compiler or compiler.startswith("ccache "):
+            continue
+        os.environ[var] = f"ccache {compiler}"
+    os.environ.setdefault("CCACHE_COMPILERCHECK", "content")
+
+
+def _module_source(module, ext):
+    return os.path.join("src", *module.split(".")) + ext
+
+
+def _ext_modules():
+    try:
+        from Cython.Build import cythonize
+    except ImportError:
+        # No Cython: build from the pre-generated C sources shipped in the sdist,
+        # if any, else fall back to a pure-python install.
+        extensions = [
+            Extension(module, [_module_source(module, ".c")])
+            for module in _CYTHON_MODULES
+            if os.path.exists(_module_source(module, ".c"))
+        ]
+    else:
+        extensions = cythonize(
+            [
+                Extension(module, [_module_source(module, ".py")])
+                for module in _CYTHON_MODULES
+            ],
+            language_level=3,
+            compiler_directives={
+                # keep python semantics for annotated NamedTuple fields and args
+                "annotation_typing": False,
+                "binding": True,
+            },
+        )
+    # If compiling fails (e.g. no C compiler) install the pure-python modules
+    # instead of failing the build; set after cythonize, which doesn't keep it.
+    for extension in extensions:
+        extension.optional = True
+    return extensions
 
 
 setup_args = dict(
     name="picosvgx",
     version="0.1.0",
     package_dir={"": "src"},
-    packages=find_packages(where="src"),
+    packages=find_packages(
+        where="src",
+        include=("picosvgx", "picosvgx.*"),
+        exclude=("tests", "tests.*", "*.tests", "*.tests.*"),
+    ),
     entry_points={
         "console_scripts": [
             "picosvgx=picosvgx.picosvgx:main",
         ],
     },
+    ext_modules=_ext_modules(),
     setup_requires=["setuptools"],
     install_requires=[
         "absl-py>=0.9.0",
@@ -35,12 +103,11 @@ setup_args = dict(
         "dev": [
             "pytest",
             "pytest-clarity",
+            "pytest-xdist",
             "black==23.3.0",
             "pytype==2020.11.23; python_version < '3.9'",
         ],
     },
-    # this is so we can use the built-in dataclasses module
-    python_requires=">=3.8",
     # this is for type checker to use our inline type hints:
     # https://www.python.org/dev/peps/pep-0561/#id18
     package_data={"picosvgx": ["py.typed"]},
@@ -54,4 +121,5 @@ setup_args = dict(
 
 
 if __name__ == "__main__":
+    _use_ccache()
     setup(**setup_args)
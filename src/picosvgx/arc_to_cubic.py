@@ -143,7 +143,7 @@ def _arc_to_cubic(arc: EllipticalArc) -> Iterator[Tuple[Point, Point, Point]]:
         start_theta = arc_params.theta1 + i * arc_params.theta_arc / num_segments
         end_theta = arc_params.theta1 + (i + 1) * arc_params.theta_arc / num_segments
 
-        t = (4 / 3) * tan(0.25 * (end_theta - start_theta))
+        t = (4.0 / 3.0) * tan(0.25 * (end_theta - start_theta))
         if not isfinite(t):
             return
 
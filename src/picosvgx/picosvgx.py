@@ -59,21 +59,23 @@ def _run(argv):
     else:
         svg = SVG.fromstring(sys.stdin.read())
 
-    # Do the needful
+    # Do the needful; nothing else uses the input, convert it without a copy
     svg = svg.topicosvg(
-        allow_text=FLAGS.allow_text, allow_all_defs=FLAGS.allow_all_defs, drop_unsupported=FLAGS.drop_unsupported
+        inplace=True,
+        allow_text=FLAGS.allow_text,
+        allow_all_defs=FLAGS.allow_all_defs,
+        drop_unsupported=FLAGS.drop_unsupported,
     )
 
     if FLAGS.clip_to_viewbox:
         svg.clip_to_viewbox(inplace=True)
 
-    output = svg.tostring(pretty_print=True)
-
     if FLAGS.output_file == "-":
-        print(output)
+        print(svg.tostring(pretty_print=True))
     else:
-        with open(FLAGS.output_file, "w") as f:
-            f.write(output)
+        # write lxml's bytes as they are, no decoding and encoding them again
+        with open(FLAGS.output_file, "wb") as f:
+            f.write(svg.tostring(pretty_print=True, as_bytes=True))
 
 
 def main(argv=None):
@@ -19,6 +19,7 @@ from functools import lru_cache, reduce
 import itertools
 from lxml import etree  # pytype: disable=import-error
 import re
+import threading
 from typing import (
     Any,
     Generator,
@@ -50,6 +51,14 @@ from picosvgx.svg_types import *
 from picosvgx.svg_transform import Affine2D
 import numbers
 
+# Namespaced tags of the svg elements we create or look up by tag
+TAG_CLIP_PATH = f"{{{svgns()}}}clipPath"
+TAG_DEFS = f"{{{svgns()}}}defs"
+TAG_G = f"{{{svgns()}}}g"
+TAG_PATH = f"{{{svgns()}}}path"
+TAG_SYMBOL = f"{{{svgns()}}}symbol"
+TAG_USE = f"{{{svgns()}}}use"
+
 _SHAPE_CLASSES = {
     "circle": SVGCircle,
     "ellipse": SVGEllipse,
@@ -90,6 +99,38 @@ _VALID_FIELDS.update(_GRADIENT_FIELDS)
 
 _XLINK_TEMP = "xlink_"
 
+# lxml parsers must not be used by several threads at once, keep one per thread
+_PARSERS = threading.local()
+
+
+def _parser():
+    parser = getattr(_PARSERS, "parser", None)
+    if parser is None:
+        # huge_tree stays off: it lifts libxml2's limits that guard against
+        # maliciously deep or large documents
+        parser = _PARSERS.parser = etree.XMLParser(
+            remove_comments=True,
+            remove_blank_text=True,
+            # external entities may load local files (e.g. /etc/passwd), so disable
+            # safe entities like &gt; are still allowed
+            resolve_entities=False,
+        )
+    return parser
+
+
+# XPath expressions evaluated on every parse or pass, compiled once
+_SVG_NSMAP = {"svg": svgns(), "xlink": xlinkns()}
+_XLINK_HREF_XPATH = etree.XPath("//*[@xlink:href]", namespaces=_SVG_NSMAP)
+_XLINK_TEMP_XPATH = etree.XPath(f"//*[@{_XLINK_TEMP}]")
+_STYLED_XPATH = etree.XPath("//svg:*[@style]", namespaces=_SVG_NSMAP)
+_HAS_ID_XPATH = etree.XPath(".//svg:*[@id]", namespaces=_SVG_NSMAP)
+_BY_ID_XPATH = etree.XPath("//svg:*[@id=$id]", namespaces=_SVG_NSMAP)
+_PROCESSING_INSTRUCTIONS_XPATH = etree.XPath("//processing-instruction()")
+_HAS_CLIP_PATH_XPATH = etree.XPath("boolean(//@clip-path)")
+_GRADIENTS_XPATH = etree.XPath(
+    " | ".join(f"//svg:{tag}" for tag in _GRADIENT_CLASSES), namespaces=_SVG_NSMAP
+)
+
 
 _ATTRIB_W_CUSTOM_INHERITANCE = frozenset({"clip-path", "opacity", "transform"})
 
@@ -131,10 +172,68 @@ _DEFS_CHILD_ALLOWED_TAGS = frozenset({
 })
 
 
+@lru_cache(maxsize=None)
+def _path_allowlist_re(allow_text, allow_all_defs):
+    """Element paths checkpicosvg accepts, all in one compiled pattern."""
+    path_allowlist = [
+        r"^/svg\[0\]$",
+        r"^/svg\[0\]/defs\[0\]$",
+        r"^/svg\[0\]/defs\[0\]/(linear|radial)Gradient\[\d+\](/stop\[\d+\])?$",
+        r"^/svg\[0\](/(path|g)\[\d+\])+$",
+    ]
+    if allow_text:
+        # Allow text elements directly under svg or nested within g elements
+        path_allowlist.append(
+            r"^/svg\[0\](/(path|g)\[\d+\])*(/(text|textPath)\[\d+\])+(/(text|tspan|textPath)\[\d+\])*$"
+        )
+    if allow_all_defs:
+        _defs_re = "|".join(sorted(_DEFS_ALLOWED_TAGS))
+        _child_re = "|".join(sorted(_DEFS_CHILD_ALLOWED_TAGS))
+        # Allow whitelisted elements in defs with safe children
+        path_allowlist.append(
+            r"^/svg\[0\]/defs\[0\]/("
+            + _defs_re
+            + r")\[\d+\](/("
+            + _child_re
+            + r")\[\d+\])*$"
+        )
+        # Allow switch/symbol/use at root level with safe children
+        # NOTE: foreignObject excluded — it can embed arbitrary HTML
+        path_allowlist.append(
+            r"^/svg\[0\](/(switch|symbol|use)\[\d+\])+(/(g|path|rect|circle|ellipse|text|image)\[\d+\])*$"
+        )
+        # Allow style/pattern/mask/clipPath at root level with safe children
+        path_allowlist.append(
+            r"^/svg\[0\]/(style|pattern|mask|clipPath)\[\d+\](/(rect|circle|ellipse|path|line|polyline|polygon|g|use|image|text)\[\d+\])*$"
+        )
+    return re.compile("|".join(f"(?:{pat})" for pat in path_allowlist))
+
+
+# Elements under defs that _simplify still processes when allow_all_defs is set,
+# both with and without the svg namespace so we can test el.tag directly
+_DEFS_SIMPLIFIED_TAGS = frozenset(
+    tag
+    for local_name in (*_GRADIENT_CLASSES, "defs", "stop")
+    for tag in (local_name, f"{{{svgns()}}}{local_name}")
+)
+
+
+# Elements with nothing to draw, remove_title_meta_desc drops them
+_USELESS_TAGS = ("title", "desc", "metadata", "comment")
+
+
 def _clamp(value: float, minv: float = 0.0, maxv: float = 1.0) -> float:
     return max(min(value, maxv), minv)
 
 
+def _copy_subtree(el):
+    # for lxml elements copy.copy is already a deep copy of the whole subtree,
+    # done in C and without the memo bookkeeping of copy.deepcopy.
+    # Equal subtrees can't be shared instead: an lxml element has exactly one
+    # parent, and most passes edit the tree in place.
+    return copy.copy(el)
+
+
 def _xlink_href_attr_name() -> str:
     return f"{{{xlinkns()}}}href"
 
@@ -146,35 +245,35 @@ def _copy_new_nsmap(tree, nsm):
     return new_tree
 
 
-def _fix_xlink_ns(tree):
+def _fix_xlink_ns(tree, xlink_temps=True):
     """Fix namespace problems for SVG and xlink.
 
     Ensure SVG has proper default namespace.
     If there are xlink temps, add namespace and fix temps.
     If we declare xlink but don't use it then remove it.
+
+    Pass xlink_temps=False if the tree is known not to contain xlink temps to
+    skip searching for them.
     """
     # Ensure SVG has proper default namespace
     nsm = copy.copy(tree.nsmap)
     if nsm.get(None) != svgns():
         nsm[None] = svgns()
         tree = _copy_new_nsmap(tree, nsm)
-    xlink_nsmap = {"xlink": xlinkns()}
-    if "xlink" in tree.nsmap and not len(
-        tree.xpath("//*[@xlink:href]", namespaces=xlink_nsmap)
-    ):
+    if "xlink" in tree.nsmap and not len(_XLINK_HREF_XPATH(tree)):
         # no reason to keep xlink
         nsm = copy.copy(tree.nsmap)
         del nsm["xlink"]
         tree = _copy_new_nsmap(tree, nsm)
 
-    elif "xlink" not in tree.nsmap and len(tree.xpath(f"//*[@{_XLINK_TEMP}]")):
+    elif xlink_temps and "xlink" not in tree.nsmap and len(_XLINK_TEMP_XPATH(tree)):
         # declare xlink and fix temps
         nsm = copy.copy(tree.nsmap)
         nsm["xlink"] = xlinkns()
         tree = _copy_new_nsmap(tree, nsm)
-        for el in tree.xpath(f"//*[@{_XLINK_TEMP}]"):
+        for el in _XLINK_TEMP_XPATH(tree):
             # try to retain attrib order, unexpected when they shuffle
-            attrs = [(k, v) for k, v in el.attrib.items()]
+            attrs = el.items()
             el.attrib.clear()
             for name, value in attrs:
                 if name == _XLINK_TEMP:
@@ -190,10 +289,14 @@ def _del_attrs(el, *attr_names):
             del el.attrib[name]
 
 
+# the set of field/attribute names is small and they're looked up for every
+# element, so hand back the same interned str instead of a new one each time
+@lru_cache(maxsize=None)
 def _attr_name(field_name: str) -> str:
     return field_name.replace("_", "-")
 
 
+@lru_cache(maxsize=None)
 def _field_name(attr_name: str) -> str:
     return attr_name.replace("-", "_")
 
@@ -399,6 +502,9 @@ class SVGTraverseContext(NamedTuple):
 
 
 class SVG:
+    # __weakref__ keeps SVG weak-referenceable, as it was before slots
+    __slots__ = ("svg_root", "elements", "__weakref__")
+
     svg_root: etree.Element
     elements: List[Tuple[etree.Element, Tuple[SVGShape, ...]]]
 
@@ -407,7 +513,7 @@ class SVG:
         self.elements = []
 
     def _clone(self) -> "SVG":
-        return SVG(svg_root=copy.deepcopy(self.svg_root))
+        return SVG(svg_root=_copy_subtree(self.svg_root))
 
     def _elements(self) -> List[Tuple[etree.Element, Tuple[SVGShape, ...]]]:
         if self.elements:
@@ -471,9 +577,13 @@ class SVG:
         shapes = self.shapes()
         if not shapes:
             return None
-        return reduce(
-            lambda a, b: a.union(b), (shape.bounding_box() for shape in shapes)
-        )
+        # one min/max pass rather than building an intermediate Rect per union
+        boxes = [shape.bounding_box() for shape in shapes]
+        x = min(box.x for box in boxes)
+        y = min(box.y for box in boxes)
+        x_max = max(box.x + box.w for box in boxes)
+        y_max = max(box.y + box.h for box in boxes)
+        return Rect(x=x, y=y, w=x_max - x, h=y_max - y)
 
     def absolute(self, inplace=False):
         """Converts all basic shapes to their equivalent path."""
@@ -530,7 +640,7 @@ class SVG:
             self._update_etree()
 
         # parse all remaining style attributes (e.g. in gradients or root svg element)
-        for el in itertools.chain((self.svg_root,), self.xpath("//svg:*[@style]")):
+        for el in itertools.chain((self.svg_root,), _STYLED_XPATH(self.svg_root)):
             self._apply_styles(el)
 
         return self
@@ -562,11 +672,11 @@ class SVG:
         }
 
         # capture elements by id so even if we change it they remain stable
-        el_by_id = {el.attrib["id"]: el for el in self.xpath(".//svg:*[@id]")}
+        el_by_id = {el.attrib["id"]: el for el in _HAS_ID_XPATH(self.svg_root)}
 
         while True:
             swaps = []
-            use_els = list(self.xpath(".//svg:use", el=scope_el))
+            use_els = list(scope_el.iterdescendants(TAG_USE))
             if not use_els:
                 break
             for use_el in use_els:
@@ -578,13 +688,13 @@ class SVG:
                 if target is None:
                     raise ValueError(f"No element has id '{ref[1:]}'")
 
-                new_el = copy.deepcopy(target)
+                new_el = _copy_subtree(target)
                 # leaving id's on <use> instantiated content is a path to duplicate ids
                 for el in new_el.getiterator("*"):
                     if "id" in el.attrib:
                         del el.attrib["id"]
 
-                group = etree.Element(f"{{{svgns()}}}g", nsmap=self.svg_root.nsmap)
+                group = etree.Element(TAG_G, nsmap=self.svg_root.nsmap)
                 affine = Affine2D.identity().translate(
                     float(use_el.attrib.get("x", 0)), float(use_el.attrib.get("y", 0))
                 )
@@ -600,10 +710,10 @@ class SVG:
                 if affine != Affine2D.identity():
                     group.attrib["transform"] = affine.tostring()
 
-                for attr_name in use_el.attrib:
+                for attr_name, value in use_el.items():
                     if attr_name in attrib_not_copied:
                         continue
-                    group.attrib[attr_name] = use_el.attrib[attr_name]
+                    group.attrib[attr_name] = value
 
                 group.append(new_el)
 
@@ -665,12 +775,14 @@ class SVG:
     def _new_id(self, template):
         for i in range(1 << 16):
             potential_id = template % i
-            existing = self.xpath(f'//svg:*[@id="{potential_id}"]')
+            existing = _BY_ID_XPATH(self.svg_root, id=potential_id)
             if not existing:
                 return potential_id
         raise ValueError(f"No free id for {template}")
 
     def _traverse(self, next_fn, append_fn, resolve_clip_paths=True):
+        # most svgs don't clip at all, one probe spares checking every element
+        resolve_clip_paths = resolve_clip_paths and _HAS_CLIP_PATH_XPATH(self.svg_root)
         frontier = [
             SVGTraverseContext(
                 0,
@@ -701,9 +813,10 @@ class SVG:
                         self._resolve_clip_path(child.attrib["clip-path"], transform),
                     )
 
-                nth_of_type = child_idxs[strip_ns(child.tag)]
-                child_idxs[strip_ns(child.tag)] += 1
-                path = f"{context.path}/{strip_ns(child.tag)}[{nth_of_type}]"
+                tag = strip_ns(child.tag)
+                nth_of_type = child_idxs[tag]
+                child_idxs[tag] += 1
+                path = f"{context.path}/{tag}[{nth_of_type}]"
                 child_context = SVGTraverseContext(
                     nth_of_type,
                     child,
@@ -758,7 +871,7 @@ class SVG:
 
         new_fill = to_element(gradient)
         # TODO normalize stop elements too
-        new_fill.extend(copy.deepcopy(stop) for stop in fill_el)
+        new_fill.extend(_copy_subtree(stop) for stop in fill_el)
 
         self._apply_gradient_translation(new_fill)
 
@@ -772,7 +885,19 @@ class SVG:
         # Reversed: we want leaves first
         to_process = reversed(tuple(c for c in self.breadth_first()))
 
-        defs = etree.Element(f"{{{svgns()}}}defs")
+        # Collect everything inside defs in one go instead of matching each
+        # element's path; exported icons mostly come with no or an empty defs
+        in_defs = (
+            frozenset(
+                el
+                for defs_el in self.svg_root.iter(TAG_DEFS, "defs")
+                for el in defs_el.iterdescendants()
+            )
+            if allow_all_defs
+            else frozenset()
+        )
+
+        defs = etree.Element(TAG_DEFS)
         self.svg_root.insert(0, defs)
 
         for context in to_process:
@@ -786,10 +911,8 @@ class SVG:
             # elements inside defs (filter, mask, pattern, etc.) so that
             # _del_attrs, _inherit_attrib, and shape processing leave them
             # untouched — preserving transform and all other attributes.
-            if allow_all_defs and re.search(r"/defs\[\d+\]", context.path):
-                tag_name = strip_ns(el.tag)
-                if tag_name not in _GRADIENT_CLASSES and tag_name != "defs" and tag_name != "stop":
-                    continue
+            if el in in_defs and el.tag not in _DEFS_SIMPLIFIED_TAGS:
+                continue
 
             _del_attrs(el, "clip-path", "transform")  # handled separately
             _inherit_attrib(context.attrib, el)
@@ -1046,69 +1169,97 @@ class SVG:
             svg.remove_nonsvg_content(inplace=True)
             return svg
 
+        self._remove_content(nonsvg=True)
+
+        return self
+
+    def _remove_useless_content(self):
+        """remove_nonsvg_content, remove_anonymous_symbols and
+        remove_title_meta_desc fused into a single walk of the tree."""
+        self._remove_content(
+            nonsvg=True, anonymous_symbols=True, useless_tags=_USELESS_TAGS
+        )
+
+    def _remove_content(self, nonsvg=False, anonymous_symbols=False, useless_tags=()):
+        """Walk the tree once for the remove_* cleanups that drop elements.
+
+        nonsvg drops elements and attributes outside the svg/xlink namespaces,
+        anonymous_symbols drops symbols without id, useless_tags lists svg
+        elements to drop.
+        """
         self._update_etree()
 
-        good_ns = {svgns(), xlinkns()}
-        # Some SVGs may have no default namespace key in nsmap; avoid KeyError
-        default_ns = self.svg_root.nsmap.get(None)
-        # Accept un-namespaced elements either when default ns is SVG or missing
-        if default_ns == svgns() or default_ns is None:
-            good_ns.add(None)
+        useless_tags = frozenset(useless_tags)
+        if nonsvg:
+            good_ns = {svgns(), xlinkns()}
+            # Some SVGs may have no default namespace key in nsmap; avoid KeyError
+            default_ns = self.svg_root.nsmap.get(None)
+            # Accept un-namespaced elements either when default ns is SVG or missing
+            if default_ns == svgns() or default_ns is None:
+                good_ns.add(None)
+            elements = self.svg_root.iter("*")
+        else:
+            # only some svg elements can go, let lxml find them
+            tags = [f"{{{svgns()}}}{tag}" for tag in useless_tags]
+            if anonymous_symbols:
+                tags.append(TAG_SYMBOL)
+            elements = self.svg_root.iter(*tags)
 
         el_to_rm = []
-        for el in self.svg_root.getiterator("*"):
-            attr_to_rm = []
-            ns, _ = splitns(el.tag)
-            if ns not in good_ns:
+        for el in elements:
+            ns, tag = splitns(el.tag)
+            if nonsvg and ns not in good_ns:
+                el_to_rm.append(el)
+                continue
+            # No id makes a symbol useless
+            # https://github.com/googlefonts/picosvg/issues/46
+            if ns == svgns() and (
+                tag in useless_tags
+                or (anonymous_symbols and tag == "symbol" and "id" not in el.attrib)
+            ):
                 el_to_rm.append(el)
                 continue
-            for attr in el.attrib:
-                ns, _ = splitns(attr)
-                if ns not in good_ns:
-                    attr_to_rm.append(attr)
-            for attr in attr_to_rm:
-                del el.attrib[attr]
+            if nonsvg:
+                attr_to_rm = [a for a in el.keys() if splitns(a)[0] not in good_ns]
+                for attr in attr_to_rm:
+                    del el.attrib[attr]
 
         for el in el_to_rm:
             el.getparent().remove(el)
 
-        # Make svg default; destroy anything unexpected
-        good_nsmap = {
-            None: svgns(),
-            "xlink": xlinkns(),
-        }
-        if any(good_nsmap.get(k, None) != v for k, v in self.svg_root.nsmap.items()):
-            self.svg_root = _copy_new_nsmap(self.svg_root, good_nsmap)
+        if nonsvg:
+            # Make svg default; destroy anything unexpected
+            good_nsmap = {
+                None: svgns(),
+                "xlink": xlinkns(),
+            }
+            if any(
+                good_nsmap.get(k, None) != v for k, v in self.svg_root.nsmap.items()
+            ):
+                self.svg_root = _copy_new_nsmap(self.svg_root, good_nsmap)
 
         self.elements = None
 
-        return self
-
     def remove_processing_instructions(self, inplace=False):
         if not inplace:
-            svg = SVG(copy.deepcopy(self.svg_root))
+            svg = SVG(_copy_subtree(self.svg_root))
             svg.remove_processing_instructions(inplace=True)
             return svg
 
         self._update_etree()
 
-        for el in self.xpath("//processing-instruction()"):
+        for el in _PROCESSING_INSTRUCTIONS_XPATH(self.svg_root):
             el.getparent().remove(el)
 
         return self
 
     def remove_anonymous_symbols(self, inplace=False):
-        # No id makes a symbol useless
-        # https://github.com/googlefonts/picosvg/issues/46
         if not inplace:
             svg = self._clone()
             svg.remove_anonymous_symbols(inplace=True)
             return svg
 
-        self._update_etree()
-
-        for el in self.xpath("//svg:symbol[not(@id)]"):
-            el.getparent().remove(el)
+        self._remove_content(anonymous_symbols=True)
 
         return self
 
@@ -1118,11 +1269,7 @@ class SVG:
             svg.remove_title_meta_desc(inplace=True)
             return svg
 
-        self._update_etree()
-
-        for tag in ("title", "desc", "metadata", "comment"):
-            for el in self.xpath(f"//svg:{tag}"):
-                el.getparent().remove(el)
+        self._remove_content(useless_tags=_USELESS_TAGS)
 
         return self
 
@@ -1200,7 +1347,7 @@ class SVG:
             for el in self._iter_nested_svgs(svg)
         )
 
-        g = etree.Element(f"{{{svgns()}}}g")
+        g = etree.Element(TAG_G)
         g.extend(svg)
 
         if viewport != viewbox:
@@ -1228,10 +1375,10 @@ class SVG:
             raise NotImplementedError(f"overflow='{overflow}' is not supported")
 
         clip_path = etree.Element(
-            f"{{{svgns()}}}clipPath", {"id": self._new_id("nested-svg-viewport-%d")}
+            TAG_CLIP_PATH, {"id": self._new_id("nested-svg-viewport-%d")}
         )
         clip_path.append(to_element(SVGRect(x=x, y=y, width=width, height=height)))
-        clipped_g = etree.Element(f"{{{svgns()}}}g")
+        clipped_g = etree.Element(TAG_G)
         clipped_g.attrib["clip-path"] = f"url(#{clip_path.attrib['id']})"
         clipped_g.append(g)
 
@@ -1276,7 +1423,7 @@ class SVG:
         return self
 
     def _select_gradients(self):
-        return self.xpath(" | ".join(f"//svg:{tag}" for tag in _GRADIENT_CLASSES))
+        return _GRADIENTS_XPATH(self.svg_root)
 
     def _apply_gradient_translation(self, el: etree.Element):
         assert _is_gradient(el)
@@ -1334,7 +1481,7 @@ class SVG:
         # only copy stops if we don't have our own
         if len(gradient) == 0:
             for stop_el in template:
-                new_stop_el = copy.deepcopy(stop_el)
+                new_stop_el = _copy_subtree(stop_el)
                 # strip stop id if present; useless and no longer unique
                 _del_attrs(new_stop_el, "id")
                 gradient.append(new_stop_el)
@@ -1343,6 +1490,9 @@ class SVG:
 
     def _remove_orphaned_gradients(self):
         # remove orphaned templates, only keep gradients directly referenced by shapes
+        gradients = self._select_gradients()
+        if not gradients:
+            return  # nothing to remove, don't bother parsing all the shapes
         used_gradient_ids = set()
         for shape in self.shapes():
             if shape.fill.startswith("url("):
@@ -1354,7 +1504,7 @@ class SVG:
                     # unlikely the url target isn't a gradient but I'm not the police
                     continue
                 used_gradient_ids.add(el.attrib["id"])
-        for grad in self._select_gradients():
+        for grad in gradients:
             if grad.attrib.get("id") not in used_gradient_ids:
                 _safe_remove(grad)
 
@@ -1367,39 +1517,10 @@ class SVG:
         self._update_etree()
 
         errors = []
-        bad_paths = set()
+        # no sense reporting all the children of a bad element as bad
+        bad_elements = set()
 
-        path_allowlist = {
-            r"^/svg\[0\]$",
-            r"^/svg\[0\]/defs\[0\]$",
-            r"^/svg\[0\]/defs\[0\]/(linear|radial)Gradient\[\d+\](/stop\[\d+\])?$",
-            r"^/svg\[0\](/(path|g)\[\d+\])+$",
-        }
-        if allow_text:
-            # Allow text elements directly under svg or nested within g elements
-            path_allowlist.add(
-                r"^/svg\[0\](/(path|g)\[\d+\])*(/(text|textPath)\[\d+\])+(/(text|tspan|textPath)\[\d+\])*$"
-            )
-        if allow_all_defs:
-            _defs_re = "|".join(sorted(_DEFS_ALLOWED_TAGS))
-            _child_re = "|".join(sorted(_DEFS_CHILD_ALLOWED_TAGS))
-            # Allow whitelisted elements in defs with safe children
-            path_allowlist.add(
-                r"^/svg\[0\]/defs\[0\]/("
-                + _defs_re
-                + r")\[\d+\](/("
-                + _child_re
-                + r")\[\d+\])*$"
-            )
-            # Allow switch/symbol/use at root level with safe children
-            # NOTE: foreignObject excluded — it can embed arbitrary HTML
-            path_allowlist.add(
-                r"^/svg\[0\](/(switch|symbol|use)\[\d+\])+(/(g|path|rect|circle|ellipse|text|image)\[\d+\])*$"
-            )
-            # Allow style/pattern/mask/clipPath at root level with safe children
-            path_allowlist.add(
-                r"^/svg\[0\]/(style|pattern|mask|clipPath)\[\d+\](/(rect|circle|ellipse|path|line|polyline|polygon|g|use|image|text)\[\d+\])*$"
-            )
+        path_allowlist = _path_allowlist_re(bool(allow_text), bool(allow_all_defs))
         paths_required = {
             "/svg[0]",
             "/svg[0]/defs[0]",
@@ -1407,27 +1528,30 @@ class SVG:
 
         # Make a list of xpaths with offsets (/svg/defs[0]/..., etc)
         ids = {}
-        for context in self.breadth_first():
-            if any(context.path.startswith(bp) for bp in bad_paths):
-                continue  # no sense reporting all the children as bad
-
-            if not any((re.match(pat, context.path) for pat in path_allowlist)):
+        for path, el in _breadth_first_paths(self.svg_root, prune=bad_elements):
+            # breadth_first() resolves clip paths of everything below the root
+            # and raises if one doesn't; this walk must not accept such a tree
+            clip_path = el.attrib.get("clip-path")
+            if clip_path and clip_path != "none" and el is not self.svg_root:
+                self._resolve_clip_path(clip_path)
+
+            if not path_allowlist.match(path):
                 if drop_unsupported:
-                    _safe_remove(context.element)
+                    _safe_remove(el)
                 else:
-                    errors.append(f"BadElement: {context.path}")
-                    bad_paths.add(context.path)
+                    errors.append(f"BadElement: {path}")
+                bad_elements.add(el)
                 continue
 
-            paths_required.discard(context.path)
+            paths_required.discard(path)
 
-            el_id = context.element.attrib.get("id", None)
+            el_id = el.attrib.get("id", None)
             if el_id is not None:
                 if el_id in ids:
                     errors.append(
-                        f'BadElement: {context.path} reuses id="{el_id}", first seen at {ids[el_id]}'
+                        f'BadElement: {path} reuses id="{el_id}", first seen at {ids[el_id]}'
                     )
-                ids[el_id] = context.path
+                ids[el_id] = path
 
         for path in paths_required:
             errors.append(f"MissingElement: {path}")
@@ -1453,10 +1577,8 @@ class SVG:
         self._update_etree()
 
         # Discard useless content
-        self.remove_nonsvg_content(inplace=True)
+        self._remove_useless_content()
         self.remove_processing_instructions(inplace=True)
-        self.remove_anonymous_symbols(inplace=True)
-        self.remove_title_meta_desc(inplace=True)
 
         # Simplify things that simplify in isolation
         self.apply_style_attributes(inplace=True)
@@ -1519,46 +1641,85 @@ class SVG:
         )
         self.elements = None
 
-    def toetree(self):
+    def _synced_etree(self):
         self._update_etree()
         self.svg_root = _fix_xlink_ns(self.svg_root)
-        return copy.deepcopy(self.svg_root)
+        return self.svg_root
 
-    def tostring(self, pretty_print=False):
-        return etree.tostring(self.toetree(), pretty_print=pretty_print).decode("utf-8")
+    def toetree(self):
+        return _copy_subtree(self._synced_etree())
+
+    def tostring(self, pretty_print=False, as_bytes=False):
+        # serializing doesn't modify the tree, no need for toetree()'s copy;
+        # lxml's default (ascii) serialization escapes any non-ascii text, so
+        # the bytes decode to the same str and can be used as is if wanted
+        svg_bytes = etree.tostring(self._synced_etree(), pretty_print=pretty_print)
+        return svg_bytes if as_bytes else svg_bytes.decode("utf-8")
 
     @classmethod
     def fromstring(cls, string):
-        if isinstance(string, bytes):
-            string = string.decode("utf-8")
+        # encode because fromstring dislikes xml encoding decl if input is str;
+        # bytes go to the parser as they are
+        if isinstance(string, str):
+            string = string.encode("utf-8")
 
         # svgs are fond of not declaring xlink
         # based on https://mailman-mail5.webfaction.com/pipermail/lxml/20100323/021184.html
-        if "xlink" in string and "xmlns:xlink" not in string:
-            string = string.replace("xlink:href", _XLINK_TEMP)
+        # the string checks also tell us whether to look for temps after parsing
+        xlink_temps = b"xlink:href" in string and b"xmlns:xlink" not in string
+        if xlink_temps:
+            string = string.replace(b"xlink:href", _XLINK_TEMP.encode("ascii"))
 
-        # encode because fromstring dislikes xml encoding decl if input is str
-        parser = etree.XMLParser(
-            remove_comments=True,
-            remove_blank_text=True,
-            # external entities may load local files (e.g. /etc/passwd), so disable
-            # safe entities like &gt; are still allowed
-            resolve_entities=False,
-        )
-        tree = etree.fromstring(string.encode("utf-8"), parser)
-        tree = _fix_xlink_ns(tree)
-        return cls(tree)
+        tree = etree.fromstring(string, _parser())
+        return cls(_fix_xlink_ns(tree, xlink_temps=xlink_temps))
+
+    @classmethod
+    def frometree(cls, tree):
+        """Wrap an already parsed lxml tree or root element, e.g. from toetree().
+
+        The tree is used as is, not copied, so there is no serialize/parse
+        round trip; pass a copy if the caller still needs the original.
+        """
+        if isinstance(tree, etree._ElementTree):
+            tree = tree.getroot()
+        # only fromstring substitutes xlink temps, a tree from elsewhere has none
+        return cls(_fix_xlink_ns(tree, xlink_temps=False))
 
     @classmethod
     def parse(cls, file_or_path):
         if hasattr(file_or_path, "read"):
             raw_svg = file_or_path.read()
         else:
-            with open(file_or_path) as f:
+            # let the parser deal with the bytes, no need to decode them first
+            with open(file_or_path, "rb") as f:
                 raw_svg = f.read()
         return cls.fromstring(raw_svg)
 
 
+def _breadth_first_paths(root, prune=frozenset()):
+    """Yield (path, element) like SVG.breadth_first, without the rest of the context.
+
+    For when only the paths are needed, e.g. to check them against an allowlist;
+    skips working out transforms, clips and inherited attributes. Add an element
+    to prune when it's yielded and its children won't be visited.
+    """
+    frontier = deque([("/svg[0]", root)])
+    while frontier:
+        path, el = frontier.popleft()
+        yield path, el
+        if el in prune:
+            continue
+
+        child_idxs = defaultdict(int)
+        for child in el:
+            if _is_redundant(child.tag):
+                continue
+            tag = strip_ns(child.tag)
+            nth_of_type = child_idxs[tag]
+            child_idxs[tag] += 1
+            frontier.append((f"{path}/{tag}[{nth_of_type}]", child))
+
+
 def _inherit_copy(attrib, child, attr_name):
     if attr_name in child.attrib:
         return
@@ -1681,7 +1842,8 @@ def _inherit_attrib(
     skip_unhandled: bool = False,
     skips=frozenset(),
 ):
-    attrib: MutableMapping[str, Any] = copy.deepcopy(
+    # keys and values are all str, a shallow copy will do
+    attrib: MutableMapping[str, Any] = dict(
         attrib
     )  # pytype: disable=annotation-type-mismatch
     for attr_name in sorted(attrib.keys()):
@@ -12,9 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from functools import lru_cache
+import math
 import re
 from types import MappingProxyType
-from lxml import etree  # pytype: disable=import-error
 from typing import (
     Any,
     Container,
@@ -26,6 +27,17 @@ from typing import (
 )
 from picosvgx.geometric_types import Rect
 
+# Only the SVG tree code (picosvgx.svg) needs lxml; the path/shape helpers that
+# import this module also work on top of the stdlib ElementTree.
+try:
+    from lxml import etree  # pytype: disable=import-error
+
+    _HAVE_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as etree
+
+    _HAVE_LXML = False
+
 
 SVGCommand = Tuple[str, Tuple[float, ...]]
 SVGCommandSeq = Iterable[SVGCommand]
@@ -41,8 +53,30 @@ def xlinkns():
 
 
 def splitns(name):
-    qn = etree.QName(name)
-    return qn.namespace, qn.localname
+    if isinstance(name, str):
+        return _splitns(name)
+    # elements are looked up by their tag; anything else, e.g. comments and
+    # entities whose tag is a factory function, is rejected with a ValueError
+    if _HAVE_LXML:
+        if isinstance(name, etree._Element) and isinstance(name.tag, str):
+            return _splitns(name.tag)
+        qn = etree.QName(name)
+        return qn.namespace, qn.localname
+    if isinstance(getattr(name, "tag", None), str):
+        return _splitns(name.tag)
+    raise ValueError(f"Invalid tag name {name!r}")
+
+
+# only a handful of distinct tag and attribute names go through here
+@lru_cache(maxsize=1024)
+def _splitns(name):
+    if _HAVE_LXML:
+        qn = etree.QName(name)
+        return qn.namespace, qn.localname
+    if name[:1] == "{":
+        ns, _, localname = name[1:].partition("}")
+        return ns, localname
+    return None, name
 
 
 def strip_ns(tagname):
@@ -101,6 +135,9 @@ _CMD_COORDS = {
 }
 _CMD_COORDS.update({k.upper(): v for k, v in _CMD_COORDS.items()})
 
+# For each command the (x, y) arg index pairs, path_segment joins these with a comma
+_CMD_XY_PAIRS = {k: frozenset(zip(*v)) for k, v in _CMD_COORDS.items()}
+
 
 def cmd_coords(cmd):
     if not cmd in _CMD_ARGS:
@@ -109,13 +146,59 @@ def cmd_coords(cmd):
 
 
 def ntos(n: float) -> str:
-    # strip superflous .0 decimals
+    # strip superflous .0 decimals; most coordinates are whole numbers so check
+    # is_integer first, str(int) is cheaper than any general float formatting
     return str(int(n)) if isinstance(n, float) and n.is_integer() else str(n)
 
 
 def number_or_percentage(s: str, scale=1) -> float:
     return float(s[:-1]) / 100 * scale if s.endswith("%") else float(s)
 
+
+# Absolute unit conversions to pixels (96 DPI standard)
+# Reference: https://www.w3.org/TR/css-values-3/#absolute-lengths
+_ABSOLUTE_UNITS = MappingProxyType(
+    {
+        "px": 1.0,  # pixels (base unit)
+        "pt": 96 / 72,  # points: 1pt = 1/72 inch = 96/72 px
+        "pc": 96 / 6,  # picas: 1pc = 1/6 inch = 16px
+        "in": 96,  # inches: 1in = 96px (CSS standard)
+        "cm": 96 / 2.54,  # centimeters: 1cm = 96/2.54 px
+        "mm": 96 / 25.4,  # millimeters: 1mm = 96/25.4 px
+    }
+)
+
+# Relative units, these need a font or viewport to resolve against
+# Reference: https://www.w3.org/TR/css-values-3/#relative-lengths
+_RELATIVE_UNITS = frozenset({"em", "rem", "ex", "ch", "vw", "vh", "vmin", "vmax"})
+
+# parse_css_length's error for each relative unit, formatted once up front
+_RELATIVE_UNIT_ERRORS = MappingProxyType(
+    {
+        unit: f"Relative unit '{unit}' requires context and is not supported. "
+        f"Supported units: {', '.join(_ABSOLUTE_UNITS.keys())}, %"
+        for unit in _RELATIVE_UNITS
+    }
+)
+
+# number and (optional) unit of a CSS length, e.g. "-1.5pt"
+_CSS_LENGTH_RE = re.compile(r"^([+-]?(?:\d+\.?\d*|\.\d+))([a-z]*)$", re.IGNORECASE)
+
+
+def _css_number(s: str) -> Optional[float]:
+    # float() also accepts "inf", "nan", "1_000" and surrounding whitespace,
+    # none of which are CSS numbers; leave those to the regex to reject
+    try:
+        number = float(s)
+    except ValueError:
+        return None
+    if not math.isfinite(number) or "_" in s or s[-1].isspace():
+        return None
+    return number
+
+
+# SVGs tend to repeat the same few lengths over and over
+@lru_cache(maxsize=4096)
 def parse_css_length(s: str) -> float:
     """Parse CSS length values with absolute units and convert to pixels.
 
@@ -143,19 +226,19 @@ def parse_css_length(s: str) -> float:
     if s.endswith('%'):
         return float(s[:-1])
 
-    # Absolute unit conversions to pixels (96 DPI standard)
-    # Reference: https://www.w3.org/TR/css-values-3/#absolute-lengths
-    ABSOLUTE_UNITS = {
-        'px': 1.0,          # pixels (base unit)
-        'pt': 96 / 72,      # points: 1pt = 1/72 inch = 96/72 px
-        'pc': 96 / 6,       # picas: 1pc = 1/6 inch = 16px
-        'in': 96,           # inches: 1in = 96px (CSS standard)
-        'cm': 96 / 2.54,    # centimeters: 1cm = 96/2.54 px
-        'mm': 96 / 25.4,    # millimeters: 1mm = 96/25.4 px
-    }
+    # Fast paths for unitless values and the absolute units, which all happen
+    # to be two letters long; no regex needed
+    number = _css_number(s)
+    if number is not None:
+        return number
+    scale = _ABSOLUTE_UNITS.get(s[-2:].lower())
+    if scale is not None:
+        number = _css_number(s[:-2])
+        if number is not None:
+            return number * scale
 
     # Extract number and unit
-    match = re.match(r'^([+-]?(?:\d+\.?\d*|\.\d+))([a-z]*)$', s, re.IGNORECASE)
+    match = _CSS_LENGTH_RE.match(s)
     if not match:
         raise ValueError(f"Invalid CSS length value: {s!r}")
 
@@ -166,21 +249,21 @@ def parse_css_length(s: str) -> float:
         # No unit specified, treat as pixels
         return number
 
-    if unit in ABSOLUTE_UNITS:
-        return number * ABSOLUTE_UNITS[unit]
+    scale = _ABSOLUTE_UNITS.get(unit)
+    if scale is not None:
+        return number * scale
 
     # Reject relative units that require context (em, rem, ex, ch, vw, vh, etc.)
-    raise ValueError(
-        f"Relative unit '{unit}' requires context and is not supported. "
-        f"Supported units: {', '.join(ABSOLUTE_UNITS.keys())}, %"
-    )
+    if unit in _RELATIVE_UNIT_ERRORS:
+        raise ValueError(_RELATIVE_UNIT_ERRORS[unit])
+    raise ValueError(f"Invalid CSS length value: {s!r}")
 
 def path_segment(cmd, *args):
     # put commas between coords, spaces otherwise, author readability pref
     args_per_cmd = check_cmd(cmd, args)
-    args = [ntos(a) for a in args]
+    args = list(map(ntos, args))
     combined_args = []
-    xy_coords = set(zip(*_CMD_COORDS[cmd]))
+    xy_coords = _CMD_XY_PAIRS[cmd]
     if args_per_cmd:
         for n in range(len(args) // args_per_cmd):
             sub_args = args[n * args_per_cmd : (n + 1) * args_per_cmd]
@@ -195,6 +278,22 @@ def path_segment(cmd, *args):
     return cmd + " ".join(combined_args)
 
 
+# Many elements share the exact same style, split each distinct one only once
+@lru_cache(maxsize=1024)
+def _split_css_declarations(style: str) -> Tuple[Tuple[str, str, str], ...]:
+    declarations = []
+    for declaration in style.split(";"):
+        declaration = declaration.strip()
+        if not declaration:
+            continue
+        property_name, colon, value = declaration.partition(":")
+        if not colon or ":" in value:
+            raise ValueError(f"Invalid CSS declaration syntax: {declaration}")
+        # declaration is already stripped at both ends
+        declarations.append((declaration, property_name.rstrip(), value.lstrip()))
+    return tuple(declarations)
+
+
 def parse_css_declarations(
     style: str,
     output: MutableMapping[str, Any],
@@ -223,26 +322,26 @@ def parse_css_declarations(
     https://www.w3.org/TR/2013/REC-css-style-attr-20131107/#syntax
     """
     unparsed = []
-    for declaration in style.split(";"):
-        declaration = declaration.strip()
-        if declaration.count(":") == 1:
-            property_name, value = declaration.split(":")
-            property_name, value = property_name.strip(), value.strip()
-            if property_names is None or property_name in property_names:
-                try:
-                    output[property_name] = value
-                except ValueError:
-                    # lxml raises if attrib name is invalid (e.g. starts with '-')
-                    unparsed.append(declaration)
-            else:
+    for declaration, property_name, value in _split_css_declarations(style):
+        if property_names is None or property_name in property_names:
+            try:
+                output[property_name] = value
+            except ValueError:
+                # lxml raises if attrib name is invalid (e.g. starts with '-')
                 unparsed.append(declaration)
-        elif declaration.strip():
-            raise ValueError(f"Invalid CSS declaration syntax: {declaration}")
+        else:
+            unparsed.append(declaration)
     return "; ".join(unparsed) + ";" if unparsed else ""
 
 
+_VIEW_BOX_SEPARATOR_RE = re.compile(r",|\s+")
+
+
+# asked for again and again, e.g. once per gradient; Rect is immutable so
+# handing out the same one is fine
+@lru_cache(maxsize=256)
 def parse_view_box(s: str) -> Rect:
-    box = tuple(float(v) for v in re.split(r",|\s+", s))
+    box = tuple(float(v) for v in _VIEW_BOX_SEPARATOR_RE.split(s))
     if len(box) != 4:
         raise ValueError(f"Unable to parse viewBox: {s!r}")
     return Rect(*box)
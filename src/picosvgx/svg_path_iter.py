@@ -45,6 +45,17 @@ _IMPLICIT_REPEAT_CMD = {"m": "l", "M": "L"}
 
 
 def _parse_args(cmd: str, args: str) -> Generator[float, None, None]:
+    # z/Z and stray commands come with no args, don't bother the regex engine
+    if not args:
+        return
+    if cmd not in "Aa":
+        # Fast path: all args are floats, let the regex engine find them in one
+        # sweep. Only valid if nothing but separators is left in between;
+        # otherwise fall through to the slow loop to report the bad argument.
+        if not _FLOAT_RE.sub("", args).strip(", "):
+            yield from map(float, _FLOAT_RE.findall(args))
+            return
+
     raw_args = [s for s in _SEPARATOR_RE.split(args) if s]
     if not raw_args:
         return
@@ -94,12 +105,10 @@ def parse_svg_path(
 
     Yields tuples of (cmd, (args))."""
     command_tuples = []
-    parts = _CMD_RE.split(svg_path)[1:]
-    for i in range(0, len(parts), 2):
-        cmd = parts[i]
-        raw_args = parts[i + 1].strip()
-
-        args = tuple(_parse_args(cmd, raw_args))
+    # a single character class split, the text before the first command is dropped
+    parts = iter(_CMD_RE.split(svg_path)[1:])
+    for cmd, raw_args in zip(parts, parts):
+        args = tuple(_parse_args(cmd, raw_args.strip()))
 
         args_per_cmd = svg_meta.check_cmd(cmd, args)
         if args_per_cmd == 0 or not exploded:
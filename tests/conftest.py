@@ -0,0 +1,46 @@
+# Copyright 2020 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from svg_test_helpers import parse_svg
+
+
+# parametrized tests whose cases load svg files from the tests directory
+_FILE_BASED_TESTS = frozenset({"test_topicosvg"})
+
+
+def pytest_configure(config):
+    # pytest-xdist registers this too, but only when installed
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run tests of the same group on one worker"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # With `pytest -n auto --dist=loadgroup`, keep the cases that load the same
+    # svg file on the same worker so they share its per-process file cache.
+    for item in items:
+        if getattr(item, "originalname", None) not in _FILE_BASED_TESTS:
+            continue
+        filename = item.callspec.params.get("actual")
+        if filename is not None:
+            item.add_marker(pytest.mark.xdist_group(name=filename))
+
+
+@pytest.fixture(scope="session")
+def make_svg():
+    # SVG factory for tests that build the same input more than once: each
+    # distinct string is parsed once per session (per xdist worker) and every
+    # call gets its own copy of the tree
+    return parse_svg
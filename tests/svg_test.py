@@ -12,27 +12,46 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import dataclasses
-from copy import deepcopy
+import functools
 from textwrap import dedent
 from lxml import etree
 import math
 import pytest
-from picosvgx.svg import SVG, SVGPath
-from picosvgx.svg_meta import parse_css_declarations
+from picosvgx.svg import SVG, SVGPath, TAG_PATH
+from picosvgx.svg_meta import ntos, parse_css_declarations, path_segment, splitns
 import re
 from svg_test_helpers import *
+from svg_test_helpers import _etree_equal
 from typing import Tuple
+import weakref
+
+
+def _load_expected(filename):
+    expected_result = load_test_svg(filename)
+    drop_whitespace(expected_result)
+    return expected_result
+
+
+@functools.lru_cache(maxsize=256)
+def _expected_tree(filename):
+    # expected files are shared by many cases, load each only once; the
+    # returned tree is only ever read
+    return _load_expected(filename).toetree()
 
 
 def _test(actual, expected_result, op):
     actual = op(load_test_svg(actual))
-    expected_result = load_test_svg(expected_result)
     drop_whitespace(actual)
-    drop_whitespace(expected_result)
-    print(f"A: {pretty_print(actual.toetree())}")
-    print(f"E: {pretty_print(expected_result.toetree())}")
-    assert pretty_print(actual.toetree()) == pretty_print(expected_result.toetree())
+    actual_tree = actual.toetree()
+    if _etree_equal(actual_tree, _expected_tree(expected_result)):
+        return
+
+    # mismatch, serialize both sides (keeping namespace declarations and
+    # attribute order) for a readable diff
+    actual_str = pretty_print(actual_tree)
+    expected_str = pretty_print(_load_expected(expected_result).toetree())
+    # the message is only formatted when the assertion fails
+    assert actual_str == expected_str, f"A:\n{actual_str}\nE:\n{expected_str}"
 
 
 @pytest.mark.parametrize(
@@ -51,16 +70,16 @@ def _test(actual, expected_result, op):
         ("<line x1='1' y1='1' x2='10' y2='10' stroke='red'/>", {"stroke": "red"}),
     ],
 )
-def test_common_attrib(shape, expected_fields):
-    svg = SVG.fromstring(svg_string(shape))
-    field_values = dataclasses.asdict(svg.shapes()[0])
+def test_common_attrib(make_svg, shape, expected_fields):
+    svg = make_svg(svg_string(shape))
+    shape = svg.shapes()[0]
     for field_name, expected_value in expected_fields.items():
-        assert field_values.get(field_name, "") == expected_value, field_name
+        assert getattr(shape, field_name, "") == expected_value, field_name
 
     svg = svg.shapes_to_paths()
-    field_values = dataclasses.asdict(svg.shapes()[0])
+    shape = svg.shapes()[0]
     for field_name, expected_value in expected_fields.items():
-        assert field_values.get(field_name, "") == expected_value, field_name
+        assert getattr(shape, field_name, "") == expected_value, field_name
 
 
 # https://www.w3.org/TR/SVG11/shapes.html
@@ -124,9 +143,9 @@ def test_common_attrib(shape, expected_fields):
         ),
     ],
 )
-def test_shapes_to_paths(shape: str, expected_path: str):
-    actual = SVG.fromstring(svg_string(shape)).shapes_to_paths(inplace=True).toetree()
-    expected_result = SVG.fromstring(svg_string(f"<path {expected_path}/>")).toetree()
+def test_shapes_to_paths(make_svg, shape: str, expected_path: str):
+    actual = make_svg(svg_string(shape)).shapes_to_paths(inplace=True).toetree()
+    expected_result = make_svg(svg_string(f"<path {expected_path}/>")).toetree()
     print(f"A: {pretty_print(actual)}")
     print(f"E: {pretty_print(expected_result)}")
     assert etree.tostring(actual) == etree.tostring(expected_result)
@@ -173,8 +192,8 @@ def test_shapes_to_paths(shape: str, expected_path: str):
         ),
     ],
 )
-def test_iter(shape, expected_cmds):
-    svg_path = SVG.fromstring(svg_string(shape)).shapes_to_paths().shapes()[0]
+def test_iter(make_svg, shape, expected_cmds):
+    svg_path = make_svg(svg_string(shape)).shapes_to_paths().shapes()[0]
     actual_cmds = [t for t in svg_path]
     print(f"A: {actual_cmds}")
     print(f"E: {expected_cmds}")
@@ -188,113 +207,117 @@ def test_resolve_use(actual, expected_result):
     _test(actual, expected_result, lambda svg: svg.resolve_use(inplace=True))
 
 
+_TOPICOSVG_CASES = (
+    ("stroke-simplepath-before.svg", "stroke-simplepath-nano.svg"),
+    ("stroke-path-before.svg", "stroke-path-nano.svg"),
+    ("stroke-capjoinmiterlimit-before.svg", "stroke-capjoinmiterlimit-nano.svg"),
+    ("scale-strokes-before.svg", "scale-strokes-nano.svg"),
+    ("stroke-fill-opacity-before.svg", "stroke-fill-opacity-nano.svg"),
+    ("stroke-dasharray-before.svg", "stroke-dasharray-nano.svg"),
+    ("stroke-circle-dasharray-before.svg", "stroke-circle-dasharray-nano.svg"),
+    ("clip-rect.svg", "clip-rect-clipped-nano.svg"),
+    ("clip-ellipse.svg", "clip-ellipse-clipped-nano.svg"),
+    ("clip-curves.svg", "clip-curves-clipped-nano.svg"),
+    ("clip-multirect.svg", "clip-multirect-clipped-nano.svg"),
+    ("clip-groups.svg", "clip-groups-clipped-nano.svg"),
+    ("clip-use.svg", "clip-use-clipped-nano.svg"),
+    ("clip-rule-example.svg", "clip-rule-example-nano.svg"),
+    ("clip-from-brazil-flag.svg", "clip-from-brazil-flag-nano.svg"),
+    ("clip-rule-evenodd.svg", "clip-rule-evenodd-clipped-nano.svg"),
+    ("clip-clippath-attrs.svg", "clip-clippath-attrs-nano.svg"),
+    ("clip-clippath-none.svg", "clip-clippath-none-nano.svg"),
+    ("rotated-rect.svg", "rotated-rect-nano.svg"),
+    ("translate-rect.svg", "translate-rect-nano.svg"),
+    ("ungroup-before.svg", "ungroup-nano.svg"),
+    ("ungroup-multiple-children-before.svg", "ungroup-multiple-children-nano.svg"),
+    ("group-stroke-before.svg", "group-stroke-nano.svg"),
+    ("arcs-before.svg", "arcs-nano.svg"),
+    ("invisible-before.svg", "invisible-nano.svg"),
+    ("transform-before.svg", "transform-nano.svg"),
+    ("group-data-name-before.svg", "group-data-name-nano.svg"),
+    ("matrix-before.svg", "matrix-nano.svg"),
+    ("degenerate-before.svg", "degenerate-nano.svg"),
+    ("fill-rule-evenodd-before.svg", "fill-rule-evenodd-nano.svg"),
+    ("twemoji-lesotho-flag-before.svg", "twemoji-lesotho-flag-nano.svg"),
+    ("inline-css-style-before.svg", "inline-css-style-nano.svg"),
+    ("clipped-strokes-before.svg", "clipped-strokes-nano.svg"),
+    ("drop-anon-symbols-before.svg", "drop-anon-symbols-nano.svg"),
+    ("scale-strokes-before.svg", "scale-strokes-nano.svg"),
+    ("ungroup-with-ids-before.svg", "ungroup-with-ids-nano.svg"),
+    ("stroke-with-id-before.svg", "stroke-with-id-nano.svg"),
+    ("drop-title-meta-desc-before.svg", "drop-title-meta-desc-nano.svg"),
+    ("no-viewbox-before.svg", "no-viewbox-nano.svg"),
+    ("decimal-viewbox-before.svg", "decimal-viewbox-nano.svg"),
+    ("inkscape-noise-before.svg", "inkscape-noise-nano.svg"),
+    ("flag-use-before.svg", "flag-use-nano.svg"),
+    ("ungroup-transform-before.svg", "ungroup-transform-nano.svg"),
+    ("pathops-tricky-path-before.svg", "pathops-tricky-path-nano.svg"),
+    ("gradient-template-1-before.svg", "gradient-template-1-nano.svg"),
+    ("nested-svg-slovenian-flag-before.svg", "nested-svg-slovenian-flag-nano.svg"),
+    ("global-fill-none-before.svg", "global-fill-none-nano.svg"),
+    ("stroke-polyline-before.svg", "stroke-polyline-nano.svg"),
+    ("clip-the-clip-before.svg", "clip-the-clip-nano.svg"),
+    ("ungroup-group-transform-before.svg", "ungroup-group-transform-nano.svg"),
+    ("ungroup-transform-clip-before.svg", "ungroup-transform-clip-nano.svg"),
+    (
+        "ungroup-retain-for-opacity-before.svg",
+        "ungroup-retain-for-opacity-nano.svg",
+    ),
+    (
+        "transform-radial-userspaceonuse-before.svg",
+        "transform-radial-userspaceonuse-nano.svg",
+    ),
+    (
+        "transform-linear-objectbbox-before.svg",
+        "transform-linear-objectbbox-nano.svg",
+    ),
+    (
+        "transform-radial-objectbbox-before.svg",
+        "transform-radial-objectbbox-nano.svg",
+    ),
+    (
+        "illegal-inheritance-before.svg",
+        "illegal-inheritance-nano.svg",
+    ),
+    (
+        "explicit-default-fill-no-inherit-before.svg",
+        "explicit-default-fill-no-inherit-nano.svg",
+    ),
+    (
+        "explicit-default-stroke-no-inherit-before.svg",
+        "explicit-default-stroke-no-inherit-nano.svg",
+    ),
+    (
+        "inherit-default-fill-before.svg",
+        "inherit-default-fill-nano.svg",
+    ),
+    # propagation of display:none
+    (
+        "display_none-before.svg",
+        "display_none-nano.svg",
+    ),
+    # https://github.com/googlefonts/picosvg/issues/252
+    (
+        "strip_empty_subpath-before.svg",
+        "strip_empty_subpath-nano.svg",
+    ),
+    (
+        "xpacket-before.svg",
+        "xpacket-nano.svg",
+    ),
+    # https://github.com/googlefonts/picosvg/issues/297
+    # Demonstrate comments outside root drop just fine
+    (
+        "comments-before.svg",
+        "comments-nano.svg",
+    ),
+)
+# ids computed once at import, same as pytest would generate
+_TOPICOSVG_IDS = tuple(f"{a}-{e}" for a, e in _TOPICOSVG_CASES)
+
+
 @pytest.mark.parametrize(
-    "actual, expected_result",
-    [
-        ("stroke-simplepath-before.svg", "stroke-simplepath-nano.svg"),
-        ("stroke-path-before.svg", "stroke-path-nano.svg"),
-        ("stroke-capjoinmiterlimit-before.svg", "stroke-capjoinmiterlimit-nano.svg"),
-        ("scale-strokes-before.svg", "scale-strokes-nano.svg"),
-        ("stroke-fill-opacity-before.svg", "stroke-fill-opacity-nano.svg"),
-        ("stroke-dasharray-before.svg", "stroke-dasharray-nano.svg"),
-        ("stroke-circle-dasharray-before.svg", "stroke-circle-dasharray-nano.svg"),
-        ("clip-rect.svg", "clip-rect-clipped-nano.svg"),
-        ("clip-ellipse.svg", "clip-ellipse-clipped-nano.svg"),
-        ("clip-curves.svg", "clip-curves-clipped-nano.svg"),
-        ("clip-multirect.svg", "clip-multirect-clipped-nano.svg"),
-        ("clip-groups.svg", "clip-groups-clipped-nano.svg"),
-        ("clip-use.svg", "clip-use-clipped-nano.svg"),
-        ("clip-rule-example.svg", "clip-rule-example-nano.svg"),
-        ("clip-from-brazil-flag.svg", "clip-from-brazil-flag-nano.svg"),
-        ("clip-rule-evenodd.svg", "clip-rule-evenodd-clipped-nano.svg"),
-        ("clip-clippath-attrs.svg", "clip-clippath-attrs-nano.svg"),
-        ("clip-clippath-none.svg", "clip-clippath-none-nano.svg"),
-        ("rotated-rect.svg", "rotated-rect-nano.svg"),
-        ("translate-rect.svg", "translate-rect-nano.svg"),
-        ("ungroup-before.svg", "ungroup-nano.svg"),
-        ("ungroup-multiple-children-before.svg", "ungroup-multiple-children-nano.svg"),
-        ("group-stroke-before.svg", "group-stroke-nano.svg"),
-        ("arcs-before.svg", "arcs-nano.svg"),
-        ("invisible-before.svg", "invisible-nano.svg"),
-        ("transform-before.svg", "transform-nano.svg"),
-        ("group-data-name-before.svg", "group-data-name-nano.svg"),
-        ("matrix-before.svg", "matrix-nano.svg"),
-        ("degenerate-before.svg", "degenerate-nano.svg"),
-        ("fill-rule-evenodd-before.svg", "fill-rule-evenodd-nano.svg"),
-        ("twemoji-lesotho-flag-before.svg", "twemoji-lesotho-flag-nano.svg"),
-        ("inline-css-style-before.svg", "inline-css-style-nano.svg"),
-        ("clipped-strokes-before.svg", "clipped-strokes-nano.svg"),
-        ("drop-anon-symbols-before.svg", "drop-anon-symbols-nano.svg"),
-        ("scale-strokes-before.svg", "scale-strokes-nano.svg"),
-        ("ungroup-with-ids-before.svg", "ungroup-with-ids-nano.svg"),
-        ("stroke-with-id-before.svg", "stroke-with-id-nano.svg"),
-        ("drop-title-meta-desc-before.svg", "drop-title-meta-desc-nano.svg"),
-        ("no-viewbox-before.svg", "no-viewbox-nano.svg"),
-        ("decimal-viewbox-before.svg", "decimal-viewbox-nano.svg"),
-        ("inkscape-noise-before.svg", "inkscape-noise-nano.svg"),
-        ("flag-use-before.svg", "flag-use-nano.svg"),
-        ("ungroup-transform-before.svg", "ungroup-transform-nano.svg"),
-        ("pathops-tricky-path-before.svg", "pathops-tricky-path-nano.svg"),
-        ("gradient-template-1-before.svg", "gradient-template-1-nano.svg"),
-        ("nested-svg-slovenian-flag-before.svg", "nested-svg-slovenian-flag-nano.svg"),
-        ("global-fill-none-before.svg", "global-fill-none-nano.svg"),
-        ("stroke-polyline-before.svg", "stroke-polyline-nano.svg"),
-        ("clip-the-clip-before.svg", "clip-the-clip-nano.svg"),
-        ("ungroup-group-transform-before.svg", "ungroup-group-transform-nano.svg"),
-        ("ungroup-transform-clip-before.svg", "ungroup-transform-clip-nano.svg"),
-        (
-            "ungroup-retain-for-opacity-before.svg",
-            "ungroup-retain-for-opacity-nano.svg",
-        ),
-        (
-            "transform-radial-userspaceonuse-before.svg",
-            "transform-radial-userspaceonuse-nano.svg",
-        ),
-        (
-            "transform-linear-objectbbox-before.svg",
-            "transform-linear-objectbbox-nano.svg",
-        ),
-        (
-            "transform-radial-objectbbox-before.svg",
-            "transform-radial-objectbbox-nano.svg",
-        ),
-        (
-            "illegal-inheritance-before.svg",
-            "illegal-inheritance-nano.svg",
-        ),
-        (
-            "explicit-default-fill-no-inherit-before.svg",
-            "explicit-default-fill-no-inherit-nano.svg",
-        ),
-        (
-            "explicit-default-stroke-no-inherit-before.svg",
-            "explicit-default-stroke-no-inherit-nano.svg",
-        ),
-        (
-            "inherit-default-fill-before.svg",
-            "inherit-default-fill-nano.svg",
-        ),
-        # propagation of display:none
-        (
-            "display_none-before.svg",
-            "display_none-nano.svg",
-        ),
-        # https://github.com/googlefonts/picosvg/issues/252
-        (
-            "strip_empty_subpath-before.svg",
-            "strip_empty_subpath-nano.svg",
-        ),
-        (
-            "xpacket-before.svg",
-            "xpacket-nano.svg",
-        ),
-        # https://github.com/googlefonts/picosvg/issues/297
-        # Demonstrate comments outside root drop just fine
-        (
-            "comments-before.svg",
-            "comments-nano.svg",
-        ),
-    ],
+    "actual, expected_result", _TOPICOSVG_CASES, ids=_TOPICOSVG_IDS
 )
 def test_topicosvg(actual, expected_result):
     _test(actual, expected_result, lambda svg: svg.topicosvg())
@@ -312,14 +335,12 @@ def test_topicosvg(actual, expected_result):
     ],
 )
 def test_topicosvg_drop_unsupported(actual, inplace, expected_result):
-    actual_copy = deepcopy(actual)
     # This should fail unless we drop unsupported
     with pytest.raises(ValueError) as e:
-        _test(actual_copy, expected_result, lambda svg: svg.topicosvg(inplace=inplace))
+        _test(actual, expected_result, lambda svg: svg.topicosvg(inplace=inplace))
     assert "BadElement" in str(e.value)
-    actual_copy = deepcopy(actual)
     _test(
-        actual_copy,
+        actual,
         expected_result,
         lambda svg: svg.topicosvg(inplace=inplace, drop_unsupported=True),
     )
@@ -379,7 +400,17 @@ def test_checkpicosvg(svg_file, expected_violations):
     ],
 )
 def test_viewbox(svg_string, expected_result):
-    assert SVG.fromstring(svg_string).view_box() == expected_result
+    assert parse_svg(svg_string).view_box() == expected_result
+
+
+def test_parse_view_box_cached():
+    from picosvgx.svg_meta import parse_view_box
+
+    assert parse_view_box("0 0 100 50") is parse_view_box("0 0 100 50")
+    assert parse_view_box("0,0,100,50") == (0, 0, 100, 50)
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Unable to parse viewBox"):
+            parse_view_box("0 0 100")
 
 
 @pytest.mark.parametrize(
@@ -407,7 +438,7 @@ def test_viewbox(svg_string, expected_result):
 )
 def test_remove_attributes(svg_string, names, expected_result):
     assert (
-        SVG.fromstring(svg_string).remove_attributes(names).tostring()
+        parse_svg(svg_string).remove_attributes(names).tostring()
     ) == expected_result
 
 
@@ -426,7 +457,7 @@ def test_remove_attributes(svg_string, names, expected_result):
     ],
 )
 def test_tolerance(svg_string, expected_result):
-    assert round(SVG.fromstring(svg_string).tolerance, 4) == expected_result
+    assert round(parse_svg(svg_string).tolerance, 4) == expected_result
 
 
 @pytest.mark.parametrize(
@@ -471,6 +502,23 @@ def test_parse_css_declarations_invalid(style):
         parse_css_declarations(style, {})
 
 
+def test_parse_css_declarations_repeated_style():
+    # the split declarations are cached per style string, each call must still
+    # fill its own output and honor its own property_names
+    style = "fill:red; -inkscape-font-specification:Arial; stroke:blue"
+    first, second = {}, {}
+    assert parse_css_declarations(style, first) == ""
+    assert parse_css_declarations(style, second, {"fill"}) == (
+        "-inkscape-font-specification:Arial; stroke:blue;"
+    )
+    assert first == {
+        "fill": "red",
+        "-inkscape-font-specification": "Arial",
+        "stroke": "blue",
+    }
+    assert second == {"fill": "red"}
+
+
 @pytest.mark.parametrize(
     "actual, expected_result",
     [("inline-css-style-before.svg", "inline-css-style-after.svg")],
@@ -485,6 +533,20 @@ def test_apply_style_attributes(actual, expected_result):
     )
 
 
+# copies the tree with all elements moved to the null namespace
+_STRIP_NS_XSLT = etree.XSLT(
+    etree.fromstring(
+        b'<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">'
+        b'<xsl:template match="*">'
+        b'<xsl:element name="{local-name()}">'
+        b'<xsl:copy-of select="@*"/><xsl:apply-templates/>'
+        b"</xsl:element>"
+        b"</xsl:template>"
+        b"</xsl:stylesheet>"
+    )
+)
+
+
 @pytest.mark.parametrize(
     "gradient_string, expected_result",
     [
@@ -531,14 +593,11 @@ def test_apply_style_attributes(actual, expected_result):
     ],
 )
 def test_apply_gradient_translation(gradient_string, expected_result):
-    svg = SVG.fromstring(svg_string(gradient_string))
+    svg = parse_svg(svg_string(gradient_string))
     for grad_el in svg._select_gradients():
         svg._apply_gradient_translation(grad_el)
-    el = svg.xpath_one("//svg:linearGradient | //svg:radialGradient")
-
-    for node in svg.svg_root.getiterator():
-        node.tag = etree.QName(node).localname
-    etree.cleanup_namespaces(svg.svg_root)
+    stripped = _STRIP_NS_XSLT(svg.svg_root)
+    el = stripped.xpath("//linearGradient | //radialGradient")[0]
 
     assert etree.tostring(el).decode("utf-8") == expected_result
 
@@ -594,6 +653,19 @@ def test_resolve_nested_svgs(actual, expected_result):
     )
 
 
+_EXPECTED_PRETTY = dedent(
+    """\
+    <svg xmlns="http://www.w3.org/2000/svg" version="1.1" viewBox="0 0 128 128">
+      <g>
+        <g>
+          <path d="M60,30 L100,30 L100,70 L60,70 Z"/>
+        </g>
+      </g>
+    </svg>
+    """
+)
+
+
 def test_tostring_pretty_print():
     svg = SVG.fromstring(
         '<svg xmlns="http://www.w3.org/2000/svg" version="1.1" viewBox="0 0 128 128">\n'
@@ -615,17 +687,7 @@ def test_tostring_pretty_print():
         "</svg>"
     )
 
-    assert svg.tostring(pretty_print=True) == dedent(
-        """\
-        <svg xmlns="http://www.w3.org/2000/svg" version="1.1" viewBox="0 0 128 128">
-          <g>
-            <g>
-              <path d="M60,30 L100,30 L100,70 L60,70 Z"/>
-            </g>
-          </g>
-        </svg>
-        """
-    )
+    assert svg.tostring(pretty_print=True) == _EXPECTED_PRETTY
 
 
 @pytest.mark.parametrize(
@@ -673,14 +735,17 @@ def _only(maybe_many):
     return next(iter(maybe_many))
 
 
+_SUBPATH_RE = re.compile(r"[mM][^Mm]*")
+
+
 def _subpaths(path: str) -> Tuple[str, ...]:
-    return tuple(m.group() for m in re.finditer(r"[mM][^Mm]*", path))
+    return tuple(m.group() for m in _SUBPATH_RE.finditer(path))
 
 
 # https://github.com/googlefonts/picosvg/issues/269
 # Make sure we drop subpaths that have 0 area after rounding.
 def test_shapes_for_stroked_path():
-    svg = SVG.parse(locate_test_file("emoji_u1f6d2.svg")).topicosvg()
+    svg = load_test_svg("emoji_u1f6d2.svg").topicosvg()
     path_before = _only(svg.shapes()).as_path().d
     svg = svg.topicosvg()
     path_after = _only(svg.shapes()).as_path().d
@@ -699,7 +764,7 @@ def test_topicosvg_ndigits(inplace):
         "</svg>"
     )
     pico = svg.topicosvg(ndigits=1, inplace=inplace)
-    assert pico.tostring() == dedent(
+    assert pico.tostring() == (
         '<svg xmlns="http://www.w3.org/2000/svg" version="1.1" viewBox="0 0 128 128">'
         "<defs/>"
         '<path d="M60.5,30 L100.1,30 L100.1,70 L60.5,70 Z"/>'
@@ -707,6 +772,25 @@ def test_topicosvg_ndigits(inplace):
     )
 
 
+def test_entity_reference_raises_value_error():
+    # entity nodes aren't resolved and their tag is a factory function, not a str
+    svg = SVG.fromstring(
+        '<!DOCTYPE svg [<!ENTITY name "Hello">]>'
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10">'
+        '<text x="1" y="2">&name;</text>'
+        "</svg>"
+    )
+    with pytest.raises(ValueError, match="Invalid tag name"):
+        svg.topicosvg(allow_text=True)
+
+
+def test_splitns_element():
+    el = etree.Element(TAG_PATH)
+    assert splitns(el) == splitns(el.tag) == ("http://www.w3.org/2000/svg", "path")
+    with pytest.raises(ValueError):
+        splitns(etree.Comment("not an element"))
+
+
 def test_remove_processing_instructions():
     xpacket_svg = load_test_svg("xpacket-before.svg")
     assert "xpacket" in xpacket_svg.tostring()
@@ -714,6 +798,32 @@ def test_remove_processing_instructions():
     assert "xpacket" not in pico_svg.tostring()
 
 
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "drop-anon-symbols-before.svg",
+        "drop-title-meta-desc-before.svg",
+        "inkscape-noise-before.svg",
+        "xpacket-before.svg",
+    ],
+)
+def test_remove_useless_content_matches_separate_passes(filename):
+    expected = load_test_svg(filename)
+    expected.remove_nonsvg_content(inplace=True)
+    expected.remove_anonymous_symbols(inplace=True)
+    expected.remove_title_meta_desc(inplace=True)
+
+    actual = load_test_svg(filename)
+    actual._remove_useless_content()
+
+    assert actual.tostring() == expected.tostring()
+
+
+_BAD_TEXT_RE = re.compile(
+    r"Unable to convert to picosvg: BadElement: /svg\[0\]/text\[0\]"
+)
+
+
 @pytest.mark.parametrize(
     "svg_string, match_re, expected_passthrough",
     [
@@ -726,7 +836,7 @@ def test_remove_processing_instructions():
             <text x="20" y="35">Hello</text>
             </svg>
             """,
-            r"Unable to convert to picosvg: BadElement: /svg\[0\]/text\[0\]",
+            _BAD_TEXT_RE,
             "text",
         ),
         # text with tspan
@@ -740,7 +850,7 @@ def test_remove_processing_instructions():
             </text>
             </svg>
             """,
-            r"Unable to convert to picosvg: BadElement: /svg\[0\]/text\[0\]",
+            _BAD_TEXT_RE,
             "tspan",
         ),
         # text with textPath, sample copied from https://developer.mozilla.org/en-US/docs/Web/SVG/Element/textPath
@@ -761,7 +871,7 @@ def test_remove_processing_instructions():
                 </text>
                 </svg>
             """,
-            r"Unable to convert to picosvg: BadElement: /svg\[0\]/text\[0\]",
+            _BAD_TEXT_RE,
             "textPath",
         ),
     ],
@@ -857,8 +967,8 @@ def test_robust_unit_parsing_attributes(svg_input: str, expected_output: str):
     expected_tree = expected_svg.toetree()
 
     # Compare the path data to verify correct unit conversion
-    actual_paths = actual_tree.xpath("//svg:path/@d", namespaces={"svg": "http://www.w3.org/2000/svg"})
-    expected_paths = expected_tree.xpath("//svg:path/@d", namespaces={"svg": "http://www.w3.org/2000/svg"})
+    actual_paths = [el.get("d") for el in actual_tree.iter(TAG_PATH)]
+    expected_paths = [el.get("d") for el in expected_tree.iter(TAG_PATH)]
 
     assert len(actual_paths) > 0, "No paths found in actual SVG"
     assert len(actual_paths) == len(expected_paths), f"Path count mismatch: {len(actual_paths)} != {len(expected_paths)}"
@@ -867,6 +977,26 @@ def test_robust_unit_parsing_attributes(svg_input: str, expected_output: str):
         assert actual_path == expected_path, f"Path mismatch:\nActual:   {actual_path}\nExpected: {expected_path}"
 
 
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (144.0, "144"),
+        (-7.0, "-7"),
+        (3, "3"),
+        (12.5, "12.5"),
+        (0.001, "0.001"),
+    ],
+)
+def test_ntos(value, expected):
+    assert ntos(value) == expected
+
+
+def test_path_segment_formatting():
+    assert path_segment("M", 10.0, 10.0) == "M10,10"
+    assert path_segment("C", 1.0, 2.5, 3, 4, 5, 6) == "C1,2.5 3,4 5,6"
+    assert path_segment("A", 5.0, 5.0, 0.0, 0, 1, 90.0, 90.0) == "A5 5 0 0 1 90,90"
+
+
 def test_css_length_error_handling():
     """Test that parse_css_length properly handles invalid inputs."""
     from picosvgx.svg_meta import parse_css_length
@@ -905,12 +1035,29 @@ def test_css_length_error_handling():
     with pytest.raises(ValueError, match="Invalid CSS length value"):
         parse_css_length("px100")
 
+    # unknown units aren't mistaken for relative ones
+    with pytest.raises(ValueError, match="Invalid CSS length value"):
+        parse_css_length("10foo")
+
     # Test valid inputs that should not raise
     assert parse_css_length("100px") == 100.0
     assert parse_css_length("50%") == 50.0
     assert parse_css_length("96") == 96.0  # unitless
     assert parse_css_length("-10px") == -10.0
     assert parse_css_length("1.5in") == 144.0
+    assert parse_css_length("1e2px") == 100.0
+    assert parse_css_length("12PT") == 16.0
+    assert parse_css_length("2.54cm") == pytest.approx(96.0)
+
+    # repeated values are served from the cache
+    hits = parse_css_length.cache_info().hits
+    assert parse_css_length("100px") == 100.0
+    assert parse_css_length.cache_info().hits == hits + 1
+
+    # float() accepts these, CSS doesn't
+    for value in ("inf", "nan", "1_000", "10 px"):
+        with pytest.raises(ValueError, match="Invalid CSS length value"):
+            parse_css_length(value)
 
 
 @pytest.mark.parametrize(
@@ -943,6 +1090,67 @@ def test_svg_namespace_auto_added(svg_input: str, should_have_svg_ns: bool):
         assert tree.nsmap.get(None) == "http://www.w3.org/2000/svg"
 
 
+def test_svg_weakref():
+    svg = SVG.fromstring(svg_string('<rect width="50" height="30"/>'))
+    ref = weakref.ref(svg)
+    assert ref() is svg
+
+
+def test_fromstring_returns_independent_trees():
+    svg_data = svg_string('<rect width="50" height="30"/>')
+    first = SVG.fromstring(svg_data)
+    first.shapes_to_paths(inplace=True)
+
+    second = SVG.fromstring(svg_data)
+    assert second.svg_root is not first.svg_root
+    assert second.tostring() != first.tostring()
+    assert "rect" in second.tostring()
+
+
+def test_parse_str_and_bytes_agree(tmp_path):
+    # undeclared xlink prefix, fixed up the same way for str and bytes input
+    svg_text = (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10">'
+        '<defs><rect id="r" width="1" height="1"/></defs>'
+        '<use xlink:href="#r"/>'
+        "</svg>"
+    )
+    expected = SVG.fromstring(svg_text).tostring()
+    assert "xmlns:xlink" in expected
+
+    assert SVG.fromstring(svg_text.encode("utf-8")).tostring() == expected
+
+    svg_file = tmp_path / "input.svg"
+    svg_file.write_text(svg_text, encoding="utf-8")
+    assert SVG.parse(str(svg_file)).tostring() == expected
+    with open(svg_file) as f:
+        assert SVG.parse(f).tostring() == expected
+
+
+def test_tostring_as_bytes():
+    svg = SVG.fromstring(svg_string('<text x="1" y="2">caf\u00e9</text>'))
+    svg_bytes = svg.tostring(as_bytes=True)
+    assert isinstance(svg_bytes, bytes)
+    assert svg_bytes.decode("utf-8") == svg.tostring()
+    # non-ascii text is written as a character reference
+    assert b"caf&#233;" in svg_bytes
+
+
+def test_frometree():
+    svg = SVG.fromstring(svg_string('<rect width="50" height="30"/>')).topicosvg()
+    tree = svg.toetree()
+
+    for arg in (tree, etree.ElementTree(tree)):
+        actual = SVG.frometree(arg)
+        assert actual.tostring() == svg.tostring()
+    # the tree is wrapped, not copied
+    assert SVG.frometree(tree).svg_root is tree
+
+    # a tree built without the svg namespace gets it added
+    actual = SVG.frometree(etree.fromstring('<svg><rect width="1"/></svg>'))
+    assert actual.svg_root.nsmap.get(None) == "http://www.w3.org/2000/svg"
+
+
 @pytest.mark.parametrize(
     "svg_string, expected_passthrough",
     [
@@ -1004,9 +1212,9 @@ def test_svg_namespace_auto_added(svg_input: str, should_have_svg_ns: bool):
         ),
     ],
 )
-def test_allow_all_defs(svg_string, expected_passthrough):
+def test_allow_all_defs(make_svg, svg_string, expected_passthrough):
     """Test that allow_all_defs flag preserves filter/mask/switch/pattern elements."""
-    svg = SVG.fromstring(svg_string)
+    svg = make_svg(svg_string)
 
     # Without flag, elements may be removed or cause errors (default picosvg behavior)
     try:
@@ -1016,7 +1224,7 @@ def test_allow_all_defs(svg_string, expected_passthrough):
         pass
 
     # With allow_all_defs=True, elements should be preserved
-    svg2 = SVG.fromstring(svg_string)
+    svg2 = make_svg(svg_string)
     result_with_flag = svg2.topicosvg(allow_all_defs=True).tostring()
     assert expected_passthrough in result_with_flag
 
@@ -1039,9 +1247,24 @@ def test_allow_all_defs_complex_filter():
     svg = SVG.fromstring(svg_string)
 
     # With flag, should preserve filters
-    result = svg.topicosvg(allow_all_defs=True).tostring()
-    assert "filter" in result
-    assert "feDropShadow" in result or "feGaussianBlur" in result
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
+    assert "filter" in tags
+    assert "feDropShadow" in tags or "feGaussianBlur" in tags
+
+
+@pytest.mark.parametrize("defs", ["", "<defs/>"])
+def test_allow_all_defs_without_defs_content(make_svg, defs):
+    svg_string = f"""
+    <svg viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">
+        {defs}
+        <g transform="translate(10, 10)">
+            <rect x="10" y="10" width="20" height="20" fill="red"/>
+        </g>
+    </svg>
+    """
+    expected = make_svg(svg_string).topicosvg().tostring()
+    actual = make_svg(svg_string).topicosvg(allow_all_defs=True).tostring()
+    assert actual == expected
 
 
 def test_empty_clip_path_no_crash():
@@ -1058,12 +1281,13 @@ def test_empty_clip_path_no_crash():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    # Should not crash with TypeError: 'NoneType' object is not iterable
-    try:
-        svg.topicosvg()
-    except ValueError:
-        # ValueError is acceptable (BadElement), but TypeError should not happen
-        pass
+    # An empty clipPath resolves to an empty path, never None, so callers
+    # can use it like any other clip without checking first
+    assert svg._resolve_clip_path("url(#emptyClip)") == SVGPath()
+    # and clipping to nothing leaves nothing to draw
+    assert svg.topicosvg().tostring() == (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><defs/></svg>'
+    )
 
 
 # =============================================================================
@@ -1095,14 +1319,12 @@ def test_filter_drop_shadow_with_feMerge():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    pico_svg = svg.topicosvg(allow_all_defs=True)
 
     # Verify all filter primitives are preserved
-    assert "filter" in result
-    assert "feOffset" in result
-    assert "feGaussianBlur" in result
-    assert "feMerge" in result
-    assert "feMergeNode" in result
+    assert_tags_present(
+        pico_svg, "filter", "feOffset", "feGaussianBlur", "feMerge", "feMergeNode"
+    )
 
 
 def test_filter_feColorMatrix_hue_rotation():
@@ -1124,9 +1346,11 @@ def test_filter_feColorMatrix_hue_rotation():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    pico_svg = svg.topicosvg(allow_all_defs=True)
+    result = pico_svg.tostring()
+    tags = tags_in(pico_svg)
 
-    assert "feColorMatrix" in result
+    assert "feColorMatrix" in tags
     assert "hueRotate" in result or "saturate" in result
 
 
@@ -1147,10 +1371,10 @@ def test_filter_feBlend_and_feComposite():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
-    assert "filter" in result
-    assert "feBlend" in result or "feComposite" in result or "feFlood" in result
+    assert "filter" in tags
+    assert "feBlend" in tags or "feComposite" in tags or "feFlood" in tags
 
 
 def test_filter_feTurbulence_displacement():
@@ -1167,11 +1391,9 @@ def test_filter_feTurbulence_displacement():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    pico_svg = svg.topicosvg(allow_all_defs=True)
 
-    assert "filter" in result
-    assert "feTurbulence" in result
-    assert "feDisplacementMap" in result
+    assert_tags_present(pico_svg, "filter", "feTurbulence", "feDisplacementMap")
 
 
 def test_filter_lighting_effects():
@@ -1189,11 +1411,9 @@ def test_filter_lighting_effects():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    pico_svg = svg.topicosvg(allow_all_defs=True)
 
-    assert "filter" in result
-    assert "feDiffuseLighting" in result
-    assert "fePointLight" in result
+    assert_tags_present(pico_svg, "filter", "feDiffuseLighting", "fePointLight")
 
 
 def test_mask_with_gradient():
@@ -1217,10 +1437,10 @@ def test_mask_with_gradient():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
-    assert "mask" in result
-    assert "linearGradient" in result
+    assert "mask" in tags
+    assert "linearGradient" in tags
 
 
 def test_mask_with_shapes():
@@ -1238,9 +1458,9 @@ def test_mask_with_shapes():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
-    assert "mask" in result
+    assert "mask" in tags
 
 
 def test_pattern_repeating():
@@ -1256,9 +1476,11 @@ def test_pattern_repeating():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    pico_svg = svg.topicosvg(allow_all_defs=True)
+    result = pico_svg.tostring()
+    tags = tags_in(pico_svg)
 
-    assert "pattern" in result
+    assert "pattern" in tags
     assert "patternUnits" in result
 
 
@@ -1276,9 +1498,9 @@ def test_pattern_with_transform():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
-    assert "pattern" in result
+    assert "pattern" in tags
 
 
 def test_symbol_and_use():
@@ -1295,9 +1517,9 @@ def test_symbol_and_use():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
-    assert "symbol" in result
+    assert "symbol" in tags
 
 
 def test_multiple_defs_elements_mixed():
@@ -1323,13 +1545,10 @@ def test_multiple_defs_elements_mixed():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    pico_svg = svg.topicosvg(allow_all_defs=True)
 
     # All defs should be preserved
-    assert "linearGradient" in result
-    assert "filter" in result
-    assert "mask" in result
-    assert "pattern" in result
+    assert_tags_present(pico_svg, "linearGradient", "filter", "mask", "pattern")
 
 
 def test_clipPath_with_non_shape_elements():
@@ -1367,10 +1586,12 @@ def test_allow_all_defs_with_allow_text():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True, allow_text=True).tostring()
+    pico_svg = svg.topicosvg(allow_all_defs=True, allow_text=True)
+    result = pico_svg.tostring()
+    tags = tags_in(pico_svg)
 
-    assert "filter" in result
-    assert "text" in result
+    assert "filter" in tags
+    assert "text" in tags
     assert "Hello World" in result
 
 
@@ -1396,9 +1617,9 @@ def test_allow_all_defs_with_drop_unsupported():
     """
     svg = SVG.fromstring(svg_string)
     # foreignObject is dropped; filter in defs is kept
-    result = svg.topicosvg(allow_all_defs=True, drop_unsupported=True).tostring()
-    assert "filter" in result
-    assert "foreignObject" not in result
+    tags = tags_in(svg.topicosvg(allow_all_defs=True, drop_unsupported=True))
+    assert "filter" in tags
+    assert "foreignObject" not in tags
 
 
 def test_deeply_nested_filter_structure():
@@ -1421,14 +1642,12 @@ def test_deeply_nested_filter_structure():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    pico_svg = svg.topicosvg(allow_all_defs=True)
 
     # All nested elements should be preserved
-    assert "filter" in result
-    assert "feGaussianBlur" in result
-    assert "feOffset" in result
-    assert "feColorMatrix" in result
-    assert "feMerge" in result
+    assert_tags_present(
+        pico_svg, "filter", "feGaussianBlur", "feOffset", "feColorMatrix", "feMerge"
+    )
 
 
 def test_switch_with_multiple_conditions():
@@ -1445,9 +1664,9 @@ def test_switch_with_multiple_conditions():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True, allow_text=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True, allow_text=True))
 
-    assert "switch" in result
+    assert "switch" in tags
 
 
 def test_marker_element_preserved():
@@ -1463,12 +1682,20 @@ def test_marker_element_preserved():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
-    assert "marker" in result
+    assert "marker" in tags
 
 
-def test_empty_defs_no_crash():
+def test_dangling_clip_path_is_not_accepted():
+    # allow_all_defs keeps the clip-path reference but not its clipPath, the
+    # result must be rejected rather than returned as a valid picosvg
+    svg = load_test_svg("clip-from-brazil-flag.svg")
+    with pytest.raises(ValueError, match='clipPath\\[@id="gcut"\\]'):
+        svg.topicosvg(allow_all_defs=True)
+
+
+def test_empty_defs_no_crash(make_svg):
     """Test that empty defs element doesn't cause issues."""
     svg_string = """
     <svg viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">
@@ -1476,14 +1703,29 @@ def test_empty_defs_no_crash():
         <rect x="10" y="10" width="80" height="80" fill="blue"/>
     </svg>
     """
-    svg = SVG.fromstring(svg_string)
+    svg = make_svg(svg_string)
     # Should work with or without allow_all_defs
-    result1 = svg.topicosvg().tostring()
-    svg2 = SVG.fromstring(svg_string)
-    result2 = svg2.topicosvg(allow_all_defs=True).tostring()
+    tags1 = tags_in(svg.topicosvg())
+    svg2 = make_svg(svg_string)
+    tags2 = tags_in(svg2.topicosvg(allow_all_defs=True))
+
+    assert "path" in tags1 or "rect" in tags1
+    assert "path" in tags2 or "rect" in tags2
+
+
+def test_simplify_without_gradients_skips_orphan_check(monkeypatch):
+    svg = SVG.fromstring(
+        svg_string('<rect x="10" y="10" width="80" height="80" fill="blue"/>')
+    )
+
+    def _fail(self):
+        raise AssertionError("shapes() parsed only to look for gradient users")
 
-    assert "path" in result1 or "rect" in result1
-    assert "path" in result2 or "rect" in result2
+    # _simplify ends with _remove_orphaned_gradients; with no gradient in the
+    # tree it must return before collecting the shapes' fills
+    monkeypatch.setattr(SVG, "shapes", _fail)
+    svg.simplify(inplace=True)
+    assert tags_in(svg) == {"svg", "defs", "rect"}
 
 
 def test_filter_with_feImage():
@@ -1501,9 +1743,9 @@ def test_filter_with_feImage():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
-    assert "filter" in result
+    assert "filter" in tags
 
 
 def test_multiple_filters_on_same_element():
@@ -1520,12 +1762,12 @@ def test_multiple_filters_on_same_element():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
     # Filter should be preserved
-    assert "filter" in result
+    assert "filter" in tags
     # Shapes should be converted to paths
-    assert "path" in result
+    assert "path" in tags
 
 
 def test_gradient_and_filter_together():
@@ -1550,12 +1792,12 @@ def test_gradient_and_filter_together():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
     # Both gradient and filter should be preserved
-    assert "linearGradient" in result
-    assert "filter" in result
-    assert "feGaussianBlur" in result
+    assert "linearGradient" in tags
+    assert "filter" in tags
+    assert "feGaussianBlur" in tags
 
 
 def test_root_level_style_element():
@@ -1569,9 +1811,11 @@ def test_root_level_style_element():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    pico_svg = svg.topicosvg(allow_all_defs=True)
+    result = pico_svg.tostring()
+    tags = tags_in(pico_svg)
 
-    assert "style" in result
+    assert "style" in tags
     assert "cls-1" in result
     assert "cls-2" in result
 
@@ -1588,9 +1832,9 @@ def test_root_level_pattern_element():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
-    assert "pattern" in result
+    assert "pattern" in tags
 
 
 def test_root_level_mask_element():
@@ -1606,9 +1850,9 @@ def test_root_level_mask_element():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
-    assert "mask" in result
+    assert "mask" in tags
 
 
 def test_root_level_clipPath_element():
@@ -1628,8 +1872,8 @@ def test_root_level_clipPath_element():
     """
     svg = SVG.fromstring(svg_string)
     # Should not crash - clipPath is processed and removed
-    result = svg.topicosvg(allow_all_defs=True).tostring()
-    assert "path" in result  # rect converted to path
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
+    assert "path" in tags  # rect converted to path
 
 
 def test_combined_root_level_elements():
@@ -1653,11 +1897,11 @@ def test_combined_root_level_elements():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_all_defs=True).tostring()
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
 
-    assert "style" in result
-    assert "pattern" in result
-    assert "mask" in result
+    assert "style" in tags
+    assert "pattern" in tags
+    assert "mask" in tags
 
 
 def test_pattern_fill_with_transform():
@@ -1680,8 +1924,8 @@ def test_pattern_fill_with_transform():
     """
     svg = SVG.fromstring(svg_string)
     # Should not raise AssertionError
-    result = svg.topicosvg(allow_all_defs=True).tostring()
-    assert "path" in result
+    tags = tags_in(svg.topicosvg(allow_all_defs=True))
+    assert "path" in tags
 
 
 def test_text_in_g_element():
@@ -1700,8 +1944,10 @@ def test_text_in_g_element():
     """
     svg = SVG.fromstring(svg_string)
     # Should not raise ValueError about BadElement
-    result = svg.topicosvg(allow_text=True).tostring()
-    assert "text" in result
+    pico_svg = svg.topicosvg(allow_text=True)
+    result = pico_svg.tostring()
+    tags = tags_in(pico_svg)
+    assert "text" in tags
     assert "Hello World" in result
 
 
@@ -1718,6 +1964,8 @@ def test_text_in_nested_g_elements():
     </svg>
     """
     svg = SVG.fromstring(svg_string)
-    result = svg.topicosvg(allow_text=True).tostring()
-    assert "text" in result
+    pico_svg = svg.topicosvg(allow_text=True)
+    result = pico_svg.tostring()
+    tags = tags_in(pico_svg)
+    assert "text" in tags
     assert "Nested Text" in result
@@ -12,19 +12,33 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+import functools
 from lxml import etree
 import os
 from picosvgx.svg import SVG
+from picosvgx.svg_meta import strip_ns
 
 
 def locate_test_file(filename):
     return os.path.join(os.path.dirname(__file__), filename)
 
 
+@functools.lru_cache(maxsize=256)
+def _parse_test_svg(filename):
+    # the same input/expected files are loaded by many parametrized cases;
+    # parse each once, copying a parsed tree is a lot cheaper than parsing it
+    return SVG.parse(locate_test_file(filename)).svg_root
+
+
 def load_test_svg(filename):
-    return SVG.parse(locate_test_file(filename))
+    # every SVG gets its own (mutable) copy of the cached tree; for lxml
+    # elements copy.copy copies the whole subtree
+    return SVG(copy.copy(_parse_test_svg(filename)))
 
 
+# returns immutable bytes, so repeated wrapping of the same elements is shared
+@functools.lru_cache(maxsize=512)
 def svg_string(*els):
     root = etree.fromstring(
         '<svg version="1.1" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 128 128"/>'
@@ -38,6 +52,28 @@ def svg(*els):
     return SVG.fromstring(svg_string(*els))
 
 
+@functools.lru_cache(maxsize=512)
+def _parse_cached(svg_string):
+    return SVG.fromstring(svg_string).svg_root
+
+
+def parse_svg(svg_string):
+    # parametrized tests often parse the same input; parse it once and hand
+    # out copies, so callers are free to modify the result
+    return SVG(copy.copy(_parse_cached(svg_string)))
+
+
+def tags_in(svg):
+    # local names of all elements, to check for elements without serializing
+    return frozenset(strip_ns(el.tag) for el in svg.svg_root.iter("*"))
+
+
+def assert_tags_present(svg, *tags):
+    # one walk over the tree for all the expected tags
+    missing = set(tags).difference(tags_in(svg))
+    assert not missing, f"missing elements: {sorted(missing)}"
+
+
 def pretty_print(svg_tree):
     def _reduce_text(text):
         text = text.strip() if text else None
@@ -51,10 +87,35 @@ def pretty_print(svg_tree):
     return etree.tostring(svg_tree, pretty_print=True).decode("utf-8")
 
 
+def _etree_equal(a, b):
+    # Walk both trees in lockstep, stopping at the first difference, instead of
+    # serializing them in full. Namespace declarations and attribute order
+    # count, as they would in the serialized trees.
+    walk_a = etree.iterwalk(a, events=("start", "end"))
+    walk_b = etree.iterwalk(b, events=("start", "end"))
+    for (event_a, el_a), (event_b, el_b) in zip(walk_a, walk_b):
+        if event_a != event_b or el_a.tag != el_b.tag:
+            return False
+        if event_a == "end":
+            continue
+        if (
+            el_a.items() != el_b.items()
+            or el_a.nsmap != el_b.nsmap
+            or (el_a.text or "").strip() != (el_b.text or "").strip()
+            or (el_a.tail or "").strip() != (el_b.tail or "").strip()
+        ):
+            return False
+    return next(walk_a, None) is None and next(walk_b, None) is None
+
+
 def drop_whitespace(svg):
     svg._update_etree()
-    for el in svg.svg_root.iter("*"):
-        if el.text is not None:
-            el.text = el.text.strip()
-        if el.tail is not None:
-            el.tail = el.tail.strip()
+    # one xpath query finds every text and tail node, rather than visiting
+    # each element from python
+    for text in svg.svg_root.xpath("//text()"):
+        stripped = text.strip() or None
+        parent = text.getparent()
+        if text.is_tail:
+            parent.tail = stripped
+        else:
+            parent.text = stripped
@@ -12,8 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import importlib
 import math
 import pytest
+import sys
+import picosvgx
 from picosvgx.geometric_types import Rect
 from picosvgx.svg_transform import Affine2D
 from picosvgx.svg_types import (
@@ -526,3 +529,32 @@ def test_rect():
     assert union.y == 20
     assert union.w == 45
     assert union.h == 55
+
+
+def test_shapes_without_lxml(monkeypatch):
+    # svg_meta falls back to the stdlib ElementTree when lxml is missing; import
+    # fresh copies of the modules with lxml blocked, monkeypatch puts the
+    # originals back afterwards so other tests keep using the same classes
+    monkeypatch.setitem(sys.modules, "lxml", None)
+    monkeypatch.setitem(sys.modules, "lxml.etree", None)
+    for name in list(sys.modules):
+        if name.startswith("picosvgx."):
+            monkeypatch.setattr(picosvgx, name.split(".", 1)[1], sys.modules[name])
+            monkeypatch.delitem(sys.modules, name)
+
+    svg_meta = importlib.import_module("picosvgx.svg_meta")
+    svg_path_iter = importlib.import_module("picosvgx.svg_path_iter")
+    svg_types = importlib.import_module("picosvgx.svg_types")
+
+    assert not svg_meta._HAVE_LXML
+    assert svg_meta.splitns("{http://www.w3.org/2000/svg}path") == (
+        "http://www.w3.org/2000/svg",
+        "path",
+    )
+    assert svg_meta.splitns("path") == (None, "path")
+    assert list(svg_path_iter.parse_svg_path("M1,1 l4,5")) == [
+        ("M", (1.0, 1.0)),
+        ("l", (4.0, 5.0)),
+    ]
+    path = svg_types.SVGPath(d="M1,1 L5,3 L2,7 Z")
+    assert path.bounding_box() == Rect(1, 1, 4, 6)